@@ -1,12 +1,15 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import math
 import io
 import base64
 import datetime
 from fpdf import FPDF
+from simulation import estimate_k_vec, simulate_scenarios
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -15,45 +18,31 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- Core Simulation Logic ---
-def estimate_k(temp_c, ph, wq_factor):
-    base_k = 0.005
-    temp_factor = max(0.1, math.pow(2, (temp_c - 20) / 10))
-    ph_factor = 1.0 + max(0, (ph - 7) * 0.25) if ph > 7 else 1.0 - (7 - ph) * 0.1
-    ph_factor = max(0.1, ph_factor)
-    wq_factor = max(0.1, wq_factor)
-    return base_k * temp_factor * ph_factor * wq_factor
-
-def simulate_ozone(t_array, ozone_gph, volume_l, k, fill_hr):
-    R = (ozone_gph * 1000) / (volume_l * 60)
-    t_fill_end = fill_hr * 60
-    c_peak = (R / k) * (1 - math.exp(-k * t_fill_end)) if k > 0 else R * t_fill_end
-    conc = []
-    for t_min in t_array:
-        current_conc = 0
-        if t_min <= t_fill_end:
-            current_conc = (R / k) * (1 - math.exp(-k * t_min)) if k > 0 else R * t_min
-        else:
-            time_after_fill = t_min - t_fill_end
-            current_conc = c_peak * math.exp(-k * time_after_fill) if k > 0 else c_peak
-        conc.append(max(0, current_conc))
-    return np.array(conc)
-
 # --- State Management ---
+SCENARIO_FIELDS = ("ozone_rate", "fill_hr", "volume", "temp", "ph", "wq", "sim_hr")
+
 def create_default_scenario(index):
     defaults = [(5.0, 1.0, 200.0, 25.0, 7.0, 1.0, 6.0), (10.0, 0.5, 200.0, 30.0, 8.0, 1.5, 6.0)]
     d = defaults[index % len(defaults)]
     return {"name": f"Scenario {index + 1}", "ozone_rate": d[0], "fill_hr": d[1], "volume": d[2], "temp": d[3], "ph": d[4], "wq": d[5], "sim_hr": d[6]}
 
 if 'scenarios' not in st.session_state:
-    st.session_state.scenarios = [create_default_scenario(0)]
+    first = create_default_scenario(0)
+    st.session_state.scenarios = {"name": [first["name"]], **{f: np.array([first[f]]) for f in SCENARIO_FIELDS}}
 
 def add_scenario():
-    st.session_state.scenarios.append(create_default_scenario(len(st.session_state.scenarios)))
+    sc = st.session_state.scenarios
+    s = create_default_scenario(len(sc["name"]))
+    sc["name"].append(s["name"])
+    for f in SCENARIO_FIELDS:
+        sc[f] = np.append(sc[f], s[f])
 
 def remove_scenario(index):
-    if len(st.session_state.scenarios) > 1:
-        st.session_state.scenarios.pop(index)
+    sc = st.session_state.scenarios
+    if len(sc["name"]) > 1:
+        sc["name"].pop(index)
+        for f in SCENARIO_FIELDS:
+            sc[f] = np.delete(sc[f], index)
     else:
         st.toast("Cannot remove the last scenario.", icon="⚠️")
 
@@ -69,13 +58,28 @@ class PDF(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-def generate_pdf_report(fig, table_df):
+@st.cache_data(max_entries=32, ttl=3600)
+def render_chart_png(t_values, c_matrix, names):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for name, c_values in zip(names, c_matrix):
+        ax.plot(t_values, c_values, label=name)
+    ax.set_title("Ozone Concentration Over Time")
+    ax.set_xlabel("Time (minutes)")
+    ax.set_ylabel("Ozone Concentration (mg/L)")
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format="png", dpi=150)
+    plt.close(fig)
+    return img_buffer.getvalue()
+
+@st.cache_data(max_entries=32, ttl=3600)
+def generate_pdf_report(png_bytes, table_df):
     pdf = PDF()
     pdf.add_page()
     
-    with io.BytesIO() as img_buffer:
-        fig.savefig(img_buffer, format="png", dpi=300, bbox_inches='tight')
-        pdf.image(img_buffer, x=10, y=30, w=190)
+    pdf.image(io.BytesIO(png_bytes), x=10, y=30, w=190)
 
     pdf.ln(105) 
     
@@ -88,78 +92,74 @@ def generate_pdf_report(fig, table_df):
         pdf.cell(col_widths[i], 8, header, 1, 0, 'C')
     pdf.ln()
 
-    for _, row in table_df.iterrows():
-        for i, item in enumerate(row):
-            pdf.cell(col_widths[i], 6, str(item), 1, 0, 'C')
+    cells = table_df.astype(str).to_numpy()
+    for row in cells:
+        for i, text in enumerate(row):
+            pdf.cell(col_widths[i], 6, text, 1, 0, 'C')
         pdf.ln()
         
-    return pdf.output(dest='S').decode('latin-1')
-
-def generate_html_report(fig, table_df):
-    img_buffer = io.BytesIO()
-    fig.savefig(img_buffer, format="png", bbox_inches='tight')
-    img_str = base64.b64encode(img_buffer.getvalue()).decode()
-    
-    table_html = table_df.to_html(index=False, justify='center', border=1).replace('<table', '<table style="width:100%; border-collapse: collapse; border: 1px solid #ccc;"').replace('<th>', '<th style="background-color: #f2f2f2; padding: 8px; border: 1px solid #ccc;">').replace('<td>', '<td style="padding: 8px; border: 1px solid #ccc; text-align: center;">')
-
-    html = f"""
-    <!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>Ozone Report</title><style>body {{ font-family: sans-serif; margin: 2em; }} .container {{ max-width: 1000px; margin: auto; }} h1, h2 {{ color: #2c3e50; }} img {{ max-width: 100%; border: 1px solid #ddd; padding: 5px; }} .section {{ margin-top: 2em; }}</style></head><body><div class="container"><h1>Ozone Dynamics Simulation Report</h1><p>Generated on: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p><div class="section"><h2>Concentration Over Time</h2><img src="data:image/png;base64,{img_str}" alt="Ozone Graph"></div><div class="section"><h2>Scenario Summary</h2>{table_html}</div></div></body></html>
-    """
-    return html
+    return bytes(pdf.output())
+
+@st.cache_data(max_entries=32, ttl=3600)
+def _html_report_parts(png_bytes, table_df):
+    img_str = base64.b64encode(png_bytes).decode()
+    table_html = table_df.to_html(index=False, justify='center', border=1, classes='ozone')
+    return img_str, table_html
+
+def generate_html_report(png_bytes, table_df):
+    img_str, table_html = _html_report_parts(png_bytes, table_df)
+    style = "body { font-family: sans-serif; margin: 2em; } .container { max-width: 1000px; margin: auto; } h1, h2 { color: #2c3e50; } img { max-width: 100%; border: 1px solid #ddd; padding: 5px; } .section { margin-top: 2em; } .ozone { width: 100%; border-collapse: collapse; border: 1px solid #ccc; } .ozone th { background-color: #f2f2f2; padding: 8px; border: 1px solid #ccc; } .ozone td { padding: 8px; border: 1px solid #ccc; text-align: center; }"
+    generated_on = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    return "".join((
+        '<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>Ozone Report</title><style>', style, '</style></head>',
+        '<body><div class="container"><h1>Ozone Dynamics Simulation Report</h1><p>Generated on: ', generated_on, '</p>',
+        '<div class="section"><h2>Concentration Over Time</h2><img src="data:image/png;base64,', img_str, '" alt="Ozone Graph"></div>',
+        '<div class="section"><h2>Scenario Summary</h2>', table_html, '</div></div></body></html>',
+    ))
 
 # --- Main App UI ---
 st.title("💨 Ozone Dynamics Explorer")
 st.markdown("Ozone concentration simulation over time with various factors.")
 
+sc = st.session_state.scenarios
+
 with st.sidebar:
     st.header("⚙️ Scenario Controls")
     st.button("➕ Add Scenario", on_click=add_scenario, use_container_width=True)
     st.markdown("---")
-    for i, s in enumerate(st.session_state.scenarios):
-        with st.expander(f"**{s['name']}**", expanded=True):
-            s['ozone_rate'] = st.number_input("Ozone Rate (g/h)", value=s['ozone_rate'], key=f"ozone_{i}", min_value=0.1)
-            s['fill_hr'] = st.number_input("Fill Duration (hr)", value=s['fill_hr'], key=f"fill_{i}", min_value=0.1)
-            s['volume'] = st.number_input("Water Volume (L)", value=s['volume'], key=f"vol_{i}", min_value=1.0)
-            s['temp'] = st.number_input("Temperature (°C)", value=s['temp'], key=f"temp_{i}")
-            s['ph'] = st.number_input("pH", value=s['ph'], key=f"ph_{i}", min_value=0.0, max_value=14.0, step=0.1)
-            s['wq'] = st.number_input("Water Quality Factor", value=s['wq'], key=f"wq_{i}", min_value=0.1, help="1=Pure, >1=Impurities")
-            s['sim_hr'] = st.number_input("Simulation Duration (hr)", value=s['sim_hr'], key=f"sim_{i}", min_value=0.1)
+    for i, name in enumerate(sc['name']):
+        with st.expander(f"**{name}**", expanded=True):
+            sc['ozone_rate'][i] = st.number_input("Ozone Rate (g/h)", value=float(sc['ozone_rate'][i]), key=f"ozone_{i}", min_value=0.1)
+            sc['fill_hr'][i] = st.number_input("Fill Duration (hr)", value=float(sc['fill_hr'][i]), key=f"fill_{i}", min_value=0.1)
+            sc['volume'][i] = st.number_input("Water Volume (L)", value=float(sc['volume'][i]), key=f"vol_{i}", min_value=1.0)
+            sc['temp'][i] = st.number_input("Temperature (°C)", value=float(sc['temp'][i]), key=f"temp_{i}")
+            sc['ph'][i] = st.number_input("pH", value=float(sc['ph'][i]), key=f"ph_{i}", min_value=0.0, max_value=14.0, step=0.1)
+            sc['wq'][i] = st.number_input("Water Quality Factor", value=float(sc['wq'][i]), key=f"wq_{i}", min_value=0.1, help="1=Pure, >1=Impurities")
+            sc['sim_hr'][i] = st.number_input("Simulation Duration (hr)", value=float(sc['sim_hr'][i]), key=f"sim_{i}", min_value=0.1)
             st.button("➖ Remove", on_click=remove_scenario, args=(i,), key=f"remove_{i}", use_container_width=True)
 
 # --- Process Data and Display Outputs ---
-chart_data_list = []
-table_data_list = []
-
-for s in st.session_state.scenarios:
-    k = estimate_k(s['temp'], s['ph'], s['wq'])
-    t_values = np.linspace(0, s['sim_hr'] * 60, 500)
-    c_values = simulate_ozone(t_values, s['ozone_rate'], s['volume'], k, s['fill_hr'])
-    table_data_list.append({"Scenario": s['name'], "Ozone Rate (g/h)": s['ozone_rate'], "Fill (hr)": s['fill_hr'], "Volume (L)": s['volume'], "Temp (°C)": s['temp'], "pH": s['ph'], "Water QF": s['wq'], "k (/min)": f"{k:.4f}", "T½ (min)": round(math.log(2) / k, 2) if k > 0 else "inf"})
-    chart_data_list.append(pd.DataFrame({s['name']: c_values}, index=pd.Series(t_values, name="Time (min)")))
-
-if chart_data_list:
-    combined_chart_df = pd.concat(chart_data_list, axis=1)
-    st.line_chart(combined_chart_df)
-
-if table_data_list:
-    summary_df = pd.DataFrame(table_data_list)
+_LN2 = math.log(2)
+
+names = sc['name']
+k_values = estimate_k_vec(sc['temp'], sc['ph'], sc['wq'])
+t_values, c_matrix = simulate_scenarios(sc['ozone_rate'], sc['volume'], k_values, sc['fill_hr'], sc['sim_hr'])
+chart_df = pd.DataFrame(np.column_stack((t_values, c_matrix.T)), columns=["Time (min)", *names])
+st.line_chart(chart_df, x="Time (min)")
+
+t_half = np.where(k_values > 0, _LN2 / np.maximum(k_values, 1e-30), np.inf).round(2)
+summary_df = pd.DataFrame({"Scenario": names, "Ozone Rate (g/h)": sc['ozone_rate'], "Fill (hr)": sc['fill_hr'], "Volume (L)": sc['volume'], "Temp (°C)": sc['temp'], "pH": sc['ph'], "Water QF": sc['wq'], "k (/min)": [f"{k:.4f}" for k in k_values], "T½ (min)": t_half})
+
+if not summary_df.empty:
     st.dataframe(summary_df, use_container_width=True, hide_index=True)
 
     st.divider()
     st.subheader("⬇️ Export Report")
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    for col in combined_chart_df.columns:
-        ax.plot(combined_chart_df.index, combined_chart_df[col], label=col)
-    ax.set_title("Ozone Concentration Over Time")
-    ax.set_xlabel("Time (minutes)")
-    ax.set_ylabel("Ozone Concentration (mg/L)")
-    ax.grid(True)
-    ax.legend()
-    
-    html_content = generate_html_report(fig, summary_df)
-    pdf_content = generate_pdf_report(fig, summary_df)
-    plt.close(fig)
+    png_bytes = render_chart_png(t_values, c_matrix, tuple(names))
+    html_content = generate_html_report(png_bytes, summary_df)
+    pdf_content = generate_pdf_report(png_bytes, summary_df)
 
     col1, col2 = st.columns(2)
     with col1:
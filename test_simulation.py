@@ -0,0 +1,100 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+import simulation
+
+KERNELS = [
+    pytest.param(simulation._simulate_ozone_numpy, id="numpy"),
+    pytest.param(simulation._simulate_ozone_numba, id="numba",
+                 marks=pytest.mark.skipif(simulation._simulate_ozone_numba is None, reason="numba not installed")),
+]
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_kernel_matches_closed_form(kernel):
+    t = np.array([0.0, 30.0, 60.0, 90.0, 120.0, 150.0])
+    R = np.array([1.0, 1.0])
+    k = np.array([0.01, 0.0])
+    t_fill_end = np.array([60.0, 60.0])
+    t_end = np.array([120.0, 120.0])
+
+    conc = kernel(t, R, k, t_fill_end, t_end)
+
+    c_peak = 100.0 * (1 - math.exp(-0.6))
+    expected_decaying = [0.0, 100.0 * (1 - math.exp(-0.3)), c_peak, c_peak * math.exp(-0.3), c_peak * math.exp(-0.6), np.nan]
+    expected_no_decay = [0.0, 30.0, 60.0, 60.0, 60.0, np.nan]
+    np.testing.assert_allclose(conc, [expected_decaying, expected_no_decay], rtol=1e-12, equal_nan=True)
+
+
+def test_numba_kernel_matches_numpy():
+    if simulation._simulate_ozone_numba is None:
+        pytest.skip("numba not installed")
+    t = np.linspace(0, 360, 200)
+    R = np.array([0.42, 0.83, 1.0])
+    k = np.array([0.007, 0.019, 0.0])
+    t_fill_end = np.array([60.0, 30.0, 120.0])
+    t_end = np.array([360.0, 180.0, 60.0])
+
+    expected = simulation._simulate_ozone_numpy(t, R, k, t_fill_end, t_end)
+    actual = simulation._simulate_ozone_numba(t, R, k, t_fill_end, t_end)
+
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_numpy_kernel_does_not_overflow_before_fill_end():
+    t = np.linspace(0, 600, 50)
+    k = simulation.estimate_k_vec([150.0], [7.0], [1.0])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        conc = simulation._simulate_ozone_numpy(t, np.array([0.4]), k, np.array([300.0]), np.array([600.0]))
+    assert np.isfinite(conc).all()
+
+
+def test_simulate_scenarios_pads_past_each_duration_with_nan():
+    t, conc = simulation.simulate_scenarios([5.0, 10.0], [200.0, 200.0], [0.007, 0.019], [1.0, 0.5], [6.0, 3.0])
+
+    for row, sim_hr in zip(conc, [6.0, 3.0]):
+        inside = t <= sim_hr * 60
+        assert not np.isnan(row[inside]).any()
+        assert np.isnan(row[~inside]).all()
+
+
+@pytest.mark.parametrize("sim_hr", [[0.5, 200.0], [6.0, 3.0], [1000.0]])
+def test_simulate_scenarios_samples_each_duration(sim_hr):
+    n = len(sim_hr)
+    t, _ = simulation.simulate_scenarios([5.0] * n, [200.0] * n, [0.01] * n, [0.25] * n, sim_hr)
+
+    for hours in sim_hr:
+        expected = min(500, max(64, int(hours * 24)))
+        assert np.count_nonzero(t <= hours * 60) >= expected
+
+
+def test_simulate_scenarios_grid_size_is_clamped():
+    t_short, _ = simulation.simulate_scenarios([5.0], [200.0], [0.01], [0.1], [0.5])
+    t_long, _ = simulation.simulate_scenarios([5.0], [200.0], [0.01], [1.0], [1000.0])
+
+    assert t_short.size == 64 + 1
+    assert t_long.size == 500 + 1
+
+
+def test_simulate_scenarios_includes_breakpoints():
+    fill_hr = [1.0, 0.55]
+    sim_hr = [6.0, 3.3]
+    t, _ = simulation.simulate_scenarios([5.0, 10.0], [200.0, 200.0], [0.007, 0.019], fill_hr, sim_hr)
+
+    for hours in fill_hr + sim_hr:
+        assert np.isclose(t, hours * 60, rtol=0, atol=1e-9).any()
+
+
+def test_estimate_k_vec_matches_scalar_estimate_k():
+    rng = np.random.default_rng(0)
+    temp = rng.uniform(-10.0, 60.0, 200)
+    ph = rng.uniform(0.0, 14.0, 200)
+    wq = rng.uniform(0.05, 3.0, 200)
+
+    expected = [simulation.estimate_k(*args) for args in zip(temp, ph, wq)]
+
+    np.testing.assert_allclose(simulation.estimate_k_vec(temp, ph, wq), expected, rtol=1e-12)